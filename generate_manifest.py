@@ -6,171 +6,306 @@ This script scans the public/audio directory and generates a manifest.json file
 that can be uploaded to your music server.
 
 Usage:
-    python generate_manifest.py
+    python generate_manifest.py [--verbose] [--quiet]
 
 Output:
     - manifest.json (in current directory)
     - Prints summary of found files
+
+If orjson is installed (pip install orjson) it is used to write and read
+the manifest; otherwise the standard library json module is used.
 """
 
+import argparse
 import os
 import json
+import logging
+import re
+import stat
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
 
-def generate_manifest():
-    """Generate manifest.json from public/audio directory structure."""
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+log = logging.getLogger("audalithic.manifest")
+
+# Audio file extensions picked up by the scan. The player requests
+# "<title>.mp3", so only MP3 files are listed.
+EXTENSIONS = frozenset({"mp3"})
+
+# Audio directory, relative to the project root, that the player serves
+DEFAULT_AUDIO_DIR = "public/audio"
+
+# Matches titles that still carry an audio file extension, in any case
+_EXT_RE = re.compile(
+    r"\.(?:%s)\Z" % "|".join(map(re.escape, sorted(EXTENSIONS))),
+    re.IGNORECASE,
+)
+
+def dump_manifest(manifest):
+    """Serialize a manifest dict to UTF-8 encoded, 2-space indented JSON."""
+    if orjson is not None:
+        return orjson.dumps(manifest, option=orjson.OPT_INDENT_2)
+    return json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8')
+
+def write_manifest(manifest, manifest_file):
+    """Atomically write a manifest to manifest_file.
+    
+    The serialized bytes go to a temporary file next to the target, which
+    is then renamed over it, so readers never see a partially written file.
+    An existing manifest_file keeps its permission bits.
+    """
+    data = memoryview(dump_manifest(manifest))
+    tmp_file = Path(manifest_file).with_suffix(".json.tmp")
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            try:
+                os.fchmod(fd, stat.S_IMODE(os.stat(manifest_file).st_mode))
+            except FileNotFoundError:
+                pass
+            # os.write may write less than asked for
+            while data:
+                data = data[os.write(fd, data):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, manifest_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+def load_manifest(path):
+    """Read and parse a manifest JSON file."""
+    data = Path(path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _iter_audio_files(entries):
+    """Yield the song title for each audio file among directory entries."""
+    # The name check comes first so is_file() is only consulted for
+    # candidate files.
+    for entry in entries:
+        name = entry.name
+        dot = name.rfind(".")
+        if dot > 0 and name[dot + 1:] in EXTENSIONS and entry.is_file():
+            yield name[:dot]
+
+def _scan_one_language(language_entry):
+    """Return the language name, sorted song titles and any read error.
+    
+    Errors are returned rather than raised or logged so that the caller can
+    report them in directory order once all workers have finished.
+    """
+    # Find all audio files in this language directory
+    try:
+        with os.scandir(language_entry.path) as entries:
+            audio_files = _iter_audio_files(entries)
+            first = next(audio_files, None)
+            if first is None:
+                # No audio files: skip building and sorting a list
+                return language_entry.name, [], None
+            
+            # Store just the title (without extension)
+            songs = sorted(chain([first], audio_files))
+    except OSError as e:
+        # An unreadable folder must not abort the whole run
+        return language_entry.name, [], e
+    
+    return language_entry.name, songs, None
+
+def generate_manifest(audio_dir=DEFAULT_AUDIO_DIR, manifest_file="manifest.json",
+                      verbose=False):
+    """Generate a manifest from the audio_dir directory structure.
     
-    # Define the audio directory path
-    audio_dir = Path("public/audio")
+    audio_dir and manifest_file default to the layout the player expects.
+    Every file found is only listed when verbose is true; otherwise a
+    single song count is printed per language.
+    """
     
-    if not audio_dir.exists():
-        print("❌ Error: public/audio directory not found!")
-        print("   Make sure you're running this script from the project root.")
+    audio_dir = Path(audio_dir)
+    
+    # Listing the directory doubles as the existence check
+    try:
+        with os.scandir(audio_dir) as entries:
+            audio_dir_entries = sorted(entries, key=lambda entry: entry.name)
+    except (FileNotFoundError, NotADirectoryError):
+        log.error("❌ Error: %s directory not found!", audio_dir)
+        if audio_dir == Path(DEFAULT_AUDIO_DIR):
+            log.error("   Make sure you're running this script from the project root.")
         sys.exit(1)
     
-    print("🎵 Scanning audio directory...")
-    print(f"   Directory: {audio_dir.absolute()}")
+    log.info("🎵 Scanning audio directory...")
+    # One getcwd() for both displayed paths; join keeps absolute paths as-is
+    cwd = os.getcwd()
+    log.info("   Directory: %s", os.path.join(cwd, audio_dir))
     
     manifest = {"languages": {}}
     total_songs = 0
     
-    # Scan each language directory
-    for language_dir in sorted(audio_dir.iterdir()):
-        if not language_dir.is_dir():
-            print(f"⚠️  Skipping non-directory: {language_dir.name}")
+    # Collect the language directories. DirEntry.is_dir() answers from the
+    # directory listing and only stats symlinks, so no extra lstat per entry.
+    language_dirs = []
+    for entry in audio_dir_entries:
+        if not entry.is_dir():
+            log.warning("⚠️  Skipping non-directory: %s", entry.name)
             continue
         
-        language_name = language_dir.name
-        songs = []
-        
-        print(f"\n📁 Processing language: {language_name}")
+        language_dirs.append(entry)
+    
+    # Scan the language directories concurrently; os.scandir releases the
+    # GIL, which pays off when public/audio lives on slow or remote storage
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(language_dirs)))) as executor:
+        results = list(executor.map(_scan_one_language, language_dirs))
+    
+    # Only build the per-file listing if it is going to be shown
+    list_files = verbose and log.isEnabledFor(logging.INFO)
+    
+    # Report and merge in directory order so the output stays deterministic
+    for language_name, songs, error in results:
+        log.info("\n📁 Processing language: %s", language_name)
         
-        # Find all MP3 audio files in this language directory
-        audio_files = list(language_dir.glob("*.mp3"))
+        if error is not None:
+            log.warning("   ⚠️  Could not read %s: %s", language_name, error)
+            continue
         
-        if not audio_files:
-            print(f"   ⚠️  No MP3 files found in {language_name}")
+        if not songs:
+            log.warning("   ⚠️  No MP3 files found in %s", language_name)
             continue
         
-        # Process each audio file
-        for audio_file in sorted(audio_files):
-            # Store just the title (without extension)
-            song_title = audio_file.stem
-            
-            songs.append(song_title)
-            print(f"   ✅ Found: {song_title}.mp3")
+        if list_files:
+            # One log record per language instead of one per file
+            log.info("%s", "\n".join(f"   ✅ Found: {song_title}.mp3" for song_title in songs))
         
-        if songs:
-            manifest["languages"][language_name] = songs
-            total_songs += len(songs)
-            print(f"   📊 Total songs in {language_name}: {len(songs)}")
+        manifest["languages"][language_name] = songs
+        total_songs += len(songs)
+        log.info("   📊 Total songs in %s: %d", language_name, len(songs))
     
     # Write manifest.json
-    manifest_file = Path("manifest.json")
+    manifest_file = Path(manifest_file)
     
     try:
-        with open(manifest_file, 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        write_manifest(manifest, manifest_file)
         
-        print(f"\n✅ Successfully generated manifest.json!")
-        print(f"   File location: {manifest_file.absolute()}")
-        print(f"   Total languages: {len(manifest['languages'])}")
-        print(f"   Total songs: {total_songs}")
+        log.info("\n✅ Successfully generated %s!", manifest_file.name)
+        log.info("   File location: %s", os.path.join(cwd, manifest_file))
+        log.info("   Total languages: %d", len(manifest['languages']))
+        log.info("   Total songs: %d", total_songs)
         
         # Show manifest preview
-        print(f"\n📋 Manifest preview:")
-        print("-" * 50)
-        for lang, songs in list(manifest["languages"].items())[:3]:  # Show first 3 languages
-            print(f"{lang}: {len(songs)} songs")
+        log.info("\n📋 Manifest preview:")
+        log.info("-" * 50)
+        for lang, songs in islice(manifest["languages"].items(), 3):  # Show first 3 languages
+            log.info("%s: %d songs", lang, len(songs))
             for song in songs[:3]:  # Show first 3 songs per language
-                print(f"  - {song}")
+                log.info("  - %s", song)
             if len(songs) > 3:
-                print(f"  ... and {len(songs) - 3} more")
+                log.info("  ... and %d more", len(songs) - 3)
         
         if len(manifest["languages"]) > 3:
             remaining_langs = len(manifest["languages"]) - 3
-            print(f"... and {remaining_langs} more languages")
+            log.info("... and %d more languages", remaining_langs)
         
-        print("-" * 50)
+        log.info("-" * 50)
         
-        return True
+        return True, manifest
     except Exception as e:
-        print(f"❌ Error writing manifest.json: {e}")
-        return False
+        log.error("❌ Error writing %s: %s", manifest_file, e)
+        return False, None
 
-def validate_manifest():
-    """Validate the generated manifest.json."""
+def validate_manifest(manifest=None, manifest_file="manifest.json"):
+    """Validate the generated manifest.json.
+    
+    If an already-parsed manifest is given it is checked directly,
+    otherwise manifest_file is read from disk.
+    """
     try:
-        if not Path("manifest.json").exists():
-            print("❌ manifest.json not found")
-            return False
-        
-        with open("manifest.json", 'r', encoding='utf-8') as f:
-            manifest = json.load(f)
+        if manifest is None:
+            if not Path(manifest_file).exists():
+                log.error("❌ %s not found", manifest_file)
+                return False
+            
+            manifest = load_manifest(manifest_file)
         
         if "languages" not in manifest:
-            print("❌ manifest.json missing 'languages' key")
+            log.error("❌ %s missing 'languages' key", manifest_file)
             return False
         
         if not isinstance(manifest["languages"], dict):
-            print("❌ 'languages' should be an object/dict")
+            log.error("❌ 'languages' should be an object/dict")
             return False
         
         for lang, songs in manifest["languages"].items():
             if not isinstance(lang, str):
-                print(f"❌ Language key should be a string: {lang}")
+                log.error("❌ Language key should be a string: %s", lang)
                 return False
             
             if not isinstance(songs, list):
-                print(f"❌ Songs for '{lang}' should be an array/list")
+                log.error("❌ Songs for '%s' should be an array/list", lang)
                 return False
             
             if not songs:
-                print(f"⚠️  Warning: No songs found for language '{lang}'")
+                log.warning("⚠️  Warning: No songs found for language '%s'", lang)
                 continue
             
             # Check each song entry
             for song in songs:
                 if not isinstance(song, str):
-                    print(f"❌ Song entry should be a string: {song}")
+                    log.error("❌ Song entry should be a string: %s", song)
                     return False
                     
-                if song.endswith('.mp3'):
-                    print(f"⚠️  Warning: Song '{song}' includes file extension (should be title only)")
+                if _EXT_RE.search(song):
+                    log.warning("⚠️  Warning: Song '%s' includes file extension (should be title only)", song)
         
-        print("✅ Manifest validation passed!")
+        log.info("✅ Manifest validation passed!")
         return True
         
     except json.JSONDecodeError as e:
-        print(f"❌ Invalid JSON in manifest.json: {e}")
+        log.error("❌ Invalid JSON in %s: %s", manifest_file, e)
         return False
     except Exception as e:
-        print(f"❌ Error reading manifest.json: {e}")
+        log.error("❌ Error reading %s: %s", manifest_file, e)
         return False
 
 def main():
     """Main function."""
     
-    print("🎼 Audalithic Audio Manifest Generator")
-    print("=" * 50)
+    parser = argparse.ArgumentParser(description="Generate manifest.json from public/audio.")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="list every audio file found")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print warnings and errors")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format="%(message)s", stream=sys.stdout)
+    
+    log.info("🎼 Audalithic Audio Manifest Generator")
+    log.info("=" * 50)
     
     # Generate manifest
-    if not generate_manifest():
+    ok, manifest = generate_manifest(verbose=args.verbose)
+    if not ok:
         sys.exit(1)
     
     # Validate manifest
-    if not validate_manifest():
+    if not validate_manifest(manifest):
         sys.exit(1)
     
-    print("\n🎉 All done!")
-    print("\nNext steps:")
-    print("1. Upload manifest.json to your music server root")
-    print("2. Upload the entire public/audio/ directory to your music server")
-    print("3. Test the URLs:")
-    print("   - https://aiaudio.uzay.me/manifest.json")
-    print("   - https://aiaudio.uzay.me/audio/English/[song-name].mp3")
-    print("\n🚀 Your Audalithic app should now work with remote music!")
+    log.info("\n🎉 All done!")
+    log.info("\nNext steps:")
+    log.info("1. Upload manifest.json to your music server root")
+    log.info("2. Upload the entire public/audio/ directory to your music server")
+    log.info("3. Test the URLs:")
+    log.info("   - https://aiaudio.uzay.me/manifest.json")
+    log.info("   - https://aiaudio.uzay.me/audio/English/[song-name].mp3")
+    log.info("\n🚀 Your Audalithic app should now work with remote music!")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file